@@ -20,8 +20,6 @@ import re
 from pathlib import Path
 from typing import Optional
 
-import click
-
 
 class PromptBuilder:
     def __init__(self, prompts_dir: Optional[Path] = None):
@@ -109,49 +107,59 @@ class PromptBuilder:
 
 
 # CLI interface
-@click.command()
-@click.option(
-    "--experiment", "-e", 
-    help="Experiment number (e.g., 001). If not specified, uses main.md"
-)
-@click.option(
-    "--output", "-o",
-    help="Output file. If not specified, prints to stdout"
-)
-@click.option(
-    "--list", "list_experiments", is_flag=True,
-    help="List available experiments"
-)
-def main(experiment: Optional[str], output: Optional[str], list_experiments: bool):
-    """Build AI Mediator prompts with contract schema injection."""
-    builder = PromptBuilder()
+def _build_cli():
+    """Build click command.
     
-    if list_experiments:
-        experiments = builder.list_experiments()
-        if experiments:
-            click.echo("Available experiments:")
-            for exp in experiments:
-                click.echo(f"  {exp}")
-        else:
-            click.echo("No experiments found.")
-        return
+    click is imported here so that library users (from prompt_builder
+    import PromptBuilder) don't pay for it.
+    """
+    import click
+    
+    @click.command()
+    @click.option(
+        "--experiment", "-e", 
+        help="Experiment number (e.g., 001). If not specified, uses main.md"
+    )
+    @click.option(
+        "--output", "-o",
+        help="Output file. If not specified, prints to stdout"
+    )
+    @click.option(
+        "--list", "list_experiments", is_flag=True,
+        help="List available experiments"
+    )
+    def main(experiment: Optional[str], output: Optional[str], list_experiments: bool):
+        """Build AI Mediator prompts with contract schema injection."""
+        builder = PromptBuilder()
+    
+        if list_experiments:
+            experiments = builder.list_experiments()
+            if experiments:
+                click.echo("Available experiments:")
+                for exp in experiments:
+                    click.echo(f"  {exp}")
+            else:
+                click.echo("No experiments found.")
+            return
         
-    try:
-        prompt = builder.build(experiment=experiment)
+        try:
+            prompt = builder.build(experiment=experiment)
         
-        if output:
-            Path(output).write_text(prompt, encoding="utf-8")
-            click.echo(f"Prompt written to {output}")
-        else:
-            click.echo(prompt)
+            if output:
+                Path(output).write_text(prompt, encoding="utf-8")
+                click.echo(f"Prompt written to {output}")
+            else:
+                click.echo(prompt)
             
-    except FileNotFoundError as e:
-        click.echo(f"Error: {e}", err=True)
-        exit(1)
-    except Exception as e:
-        click.echo(f"Unexpected error: {e}", err=True)
-        exit(1)
+        except FileNotFoundError as e:
+            click.echo(f"Error: {e}", err=True)
+            exit(1)
+        except Exception as e:
+            click.echo(f"Unexpected error: {e}", err=True)
+            exit(1)
+    
+    return main
 
 
 if __name__ == "__main__":
-    main()
+    _build_cli()()
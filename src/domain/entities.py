@@ -1,8 +1,8 @@
 """Domain entities for AI Mediator dialog mechanism."""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 import uuid
 
 
@@ -34,6 +34,10 @@ class DialogSession:
     created_at: datetime
     updated_at: datetime
     expires_at: Optional[datetime] = None
+    short_id: str = field(init=False, repr=False, compare=False)  # Короткий ID для ответов
+    
+    def __post_init__(self):
+        self.short_id = self.session_id[:8]
 
 
 @dataclass
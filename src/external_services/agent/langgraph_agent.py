@@ -24,7 +24,7 @@ class LangGraphAgent(AgentInterface):
         
         # TODO: Initialize LangGraph components
         # self.graph = self._build_agent_graph()
-        logger.info(f"LangGraph agent initialized with model: {model_name}")
+        logger.info("LangGraph agent initialized with model: %s", model_name)
     
     async def process_message(self, context: ConversationContext) -> AgentResponse:
         """
@@ -37,7 +37,7 @@ class LangGraphAgent(AgentInterface):
         3. Extract insights and recommendations
         4. Format response for users
         """
-        logger.info(f"Processing message for session {context.session_id}")
+        logger.info("Processing message for session %s", context.session_id)
         
         # TODO: Replace with actual LangGraph processing
         message_text = context.current_message.content
@@ -1,12 +1,16 @@
 """Main application entry point."""
+import asyncio
 import logging
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
+from redis.asyncio import Redis
+from telegram.ext import Application, MessageHandler, filters
+from telegram.request import HTTPXRequest
 
 from .config.settings import get_settings
 from .transport.telegram.handlers import TelegramHandlers
 from .service.session_service import SessionService
 from .service.message_service import MessageService
 from .repository.mock_repository import MockSessionRepository
+from .repository.cached_repository import CachedSessionRepository
 from .external_services.agent.langgraph_agent import LangGraphAgent
 
 # Configure logging
@@ -17,19 +21,44 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _install_uvloop():
+    """Use uvloop event loop where available (not on Windows)."""
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not available, using default asyncio event loop")
+        return
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Using uvloop event loop")
+
+
 def main():
     """Start the AI Mediator bot."""
     # Load configuration
     settings = get_settings()
     
-    logger.info(f"Starting bot @{settings.telegram_bot_username}")
-    logger.info(f"Database URL: {settings.database_url}")
+    # Must happen before the application creates its event loop
+    _install_uvloop()
+    
+    logger.info("Starting bot @%s", settings.telegram_bot_username)
+    logger.info("Database URL: %s", settings.database_url)
     
     # Dependency injection setup
     logger.info("Setting up dependencies...")
     
+    # Optional Redis (cache + dedup of redelivered updates)
+    redis = Redis.from_url(settings.redis_url) if settings.redis_url else None
+    
     # Repository layer
     session_repository = MockSessionRepository()
+    if redis is not None:
+        logger.info("Enabling Redis cache for session lookups")
+        session_repository = CachedSessionRepository(
+            session_repository,
+            redis,
+            ttl=settings.redis_cache_ttl
+        )
     
     # Service layer
     session_service = SessionService(session_repository)
@@ -42,15 +71,32 @@ def main():
     message_service = MessageService(session_repository, agent)
     
     # Transport layer
-    telegram_handlers = TelegramHandlers(session_service, message_service, settings)
+    telegram_handlers = TelegramHandlers(session_service, message_service, settings, redis=redis)
+    
+    async def post_shutdown(application: Application):
+        # Flush persistence first: it may still write through the Redis cache
+        await telegram_handlers.shutdown(application)
+        if redis is not None:
+            await redis.aclose()
     
-    # Bot setup
-    app = Application.builder().token(settings.telegram_bot_token).build()
+    # Bot setup: tunable HTTP connection pool and timeouts
+    request = HTTPXRequest(
+        connection_pool_size=settings.telegram_connection_pool_size,
+        pool_timeout=settings.telegram_pool_timeout,
+        connect_timeout=settings.telegram_connect_timeout,
+        read_timeout=settings.telegram_read_timeout,
+        http_version=settings.telegram_http_version,
+    )
+    app = (
+        Application.builder()
+        .token(settings.telegram_bot_token)
+        .request(request)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
-    # Add handlers
-    app.add_handler(CommandHandler("start", telegram_handlers.start_command))
-    app.add_handler(CommandHandler("invite", telegram_handlers.invite_command))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, telegram_handlers.handle_message))
+    # Single handler: commands are routed inside TelegramHandlers.dispatch
+    app.add_handler(MessageHandler(filters.TEXT, telegram_handlers.dispatch))
     
     logger.info("🤖 Bot is starting with AI-powered mediation...")
     logger.info("🧠 AI Agent: LangGraph-based mediator initialized")
@@ -68,4 +114,4 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
-        logger.error(f"Bot crashed: {e}")
+        logger.error("Bot crashed: %s", e)
@@ -0,0 +1,213 @@
+"""Read-through Redis cache for session repository."""
+import json
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .interface import SessionRepositoryInterface
+from ..domain.entities import (
+    DialogSession, Participant, ParticipantRole, InviteLink, SessionMessage, SessionStatus
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_TTL = 300  # seconds
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _fromisoformat(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def _session_to_dict(session: DialogSession) -> Dict[str, Any]:
+    return {
+        "session_id": session.session_id,
+        "status": session.status.value,
+        "created_at": _isoformat(session.created_at),
+        "updated_at": _isoformat(session.updated_at),
+        "expires_at": _isoformat(session.expires_at),
+    }
+
+
+def _session_from_dict(data: Dict[str, Any]) -> DialogSession:
+    return DialogSession(
+        session_id=data["session_id"],
+        status=SessionStatus(data["status"]),
+        created_at=_fromisoformat(data["created_at"]),
+        updated_at=_fromisoformat(data["updated_at"]),
+        expires_at=_fromisoformat(data["expires_at"]),
+    )
+
+
+def _participant_to_dict(participant: Participant) -> Dict[str, Any]:
+    return {
+        "participant_id": participant.participant_id,
+        "session_id": participant.session_id,
+        "telegram_user_id": participant.telegram_user_id,
+        "telegram_username": participant.telegram_username,
+        "role": participant.role.value,
+        "joined_at": _isoformat(participant.joined_at),
+        "is_active": participant.is_active,
+    }
+
+
+def _participant_from_dict(data: Dict[str, Any]) -> Participant:
+    return Participant(
+        participant_id=data["participant_id"],
+        session_id=data["session_id"],
+        telegram_user_id=data["telegram_user_id"],
+        telegram_username=data["telegram_username"],
+        role=ParticipantRole(data["role"]),
+        joined_at=_fromisoformat(data["joined_at"]),
+        is_active=data["is_active"],
+    )
+
+
+def _participants_from_list(data: List[Dict[str, Any]]) -> List[Participant]:
+    return [_participant_from_dict(item) for item in data]
+
+
+class CachedSessionRepository(SessionRepositoryInterface):
+    """
+    Caches hot per-message lookups in Redis, delegates everything else.
+    
+    Entries are stored as JSON so they survive changes to the entity
+    classes; anything that fails to decode is dropped and reread.
+    SessionService keeps its own short in-process cache of active
+    sessions in front of this one, so this layer mostly serves cold
+    processes and the participant lookups.
+    """
+    
+    def __init__(self, repo: SessionRepositoryInterface, redis: Redis, ttl: int = DEFAULT_CACHE_TTL):
+        self.repo = repo
+        self.redis = redis
+        self.ttl = ttl
+    
+    @staticmethod
+    def _user_session_key(telegram_user_id: int) -> str:
+        return f"usess:{telegram_user_id}"
+    
+    @staticmethod
+    def _participant_key(session_id: str, telegram_user_id: int) -> str:
+        return f"part:{session_id}:{telegram_user_id}"
+    
+    @staticmethod
+    def _session_participants_key(session_id: str) -> str:
+        return f"parts:{session_id}"
+    
+    async def _get_cached(self, key: str, decode: Callable[[Any], Any]):
+        """Return cached object or None on miss, Redis failure or stale entry."""
+        try:
+            data = await self.redis.get(key)
+        except RedisError as e:
+            logger.warning("Redis get failed for %s: %s", key, e)
+            return None
+        if data is None:
+            return None
+        
+        try:
+            return decode(json.loads(data))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Dropping undecodable cache entry %s: %s", key, e)
+            await self.invalidate_keys([key])
+            return None
+    
+    async def _set_cached(self, key: str, value: Any) -> None:
+        """Store JSON-serializable value with cache TTL."""
+        try:
+            await self.redis.set(key, json.dumps(value), ex=self.ttl)
+        except RedisError as e:
+            logger.warning("Redis set failed for %s: %s", key, e)
+    
+    async def invalidate_keys(self, keys: Iterable[str]) -> None:
+        """Drop cached entries."""
+        keys = list(keys)
+        if not keys:
+            return
+        try:
+            await self.redis.delete(*keys)
+        except RedisError as e:
+            logger.warning("Redis delete failed for %s: %s", keys, e)
+    
+    # Cached reads
+    async def get_user_active_session(self, telegram_user_id: int) -> Optional[DialogSession]:
+        key = self._user_session_key(telegram_user_id)
+        session = await self._get_cached(key, _session_from_dict)
+        if session is not None:
+            return session
+        
+        session = await self.repo.get_user_active_session(telegram_user_id)
+        if session is not None:
+            await self._set_cached(key, _session_to_dict(session))
+        return session
+    
+    async def get_participant_by_telegram_id(self, session_id: str, telegram_user_id: int) -> Optional[Participant]:
+        key = self._participant_key(session_id, telegram_user_id)
+        participant = await self._get_cached(key, _participant_from_dict)
+        if participant is not None:
+            return participant
+        
+        participant = await self.repo.get_participant_by_telegram_id(session_id, telegram_user_id)
+        if participant is not None:
+            await self._set_cached(key, _participant_to_dict(participant))
+        return participant
+    
+    async def get_session_participants(self, session_id: str) -> List[Participant]:
+        key = self._session_participants_key(session_id)
+        participants = await self._get_cached(key, _participants_from_list)
+        if participants is not None:
+            return participants
+        
+        participants = await self.repo.get_session_participants(session_id)
+        await self._set_cached(key, [_participant_to_dict(p) for p in participants])
+        return participants
+    
+    # Writes that invalidate cached reads
+    async def save_participant(self, participant: Participant) -> None:
+        await self.repo.save_participant(participant)
+        await self.invalidate_keys([
+            self._user_session_key(participant.telegram_user_id),
+            self._participant_key(participant.session_id, participant.telegram_user_id),
+            self._session_participants_key(participant.session_id),
+        ])
+    
+    async def update_session_status(self, session_id: str, status: SessionStatus) -> None:
+        await self.repo.update_session_status(session_id, status)
+        participants = await self.repo.get_session_participants(session_id)
+        await self.invalidate_keys(
+            self._user_session_key(p.telegram_user_id) for p in participants
+        )
+    
+    # Pass-through
+    async def save_session(self, session: DialogSession) -> None:
+        await self.repo.save_session(session)
+    
+    async def save_invite(self, invite: InviteLink) -> None:
+        await self.repo.save_invite(invite)
+    
+    async def get_invite_by_code(self, invite_code: str) -> Optional[InviteLink]:
+        return await self.repo.get_invite_by_code(invite_code)
+    
+    async def mark_invite_used(self, invite_code: str) -> None:
+        await self.repo.mark_invite_used(invite_code)
+    
+    async def claim_invite(self, invite_code: str, now: datetime) -> Optional[str]:
+        return await self.repo.claim_invite(invite_code, now)
+    
+    async def save_message(self, message: SessionMessage) -> bool:
+        return await self.repo.save_message(message)
+    
+    async def get_session_messages(self, session_id: str) -> List[SessionMessage]:
+        return await self.repo.get_session_messages(session_id)
+    
+    async def mark_message_processed(self, message_id: str) -> None:
+        await self.repo.mark_message_processed(message_id)
+    
+    async def get_participant_by_id(self, participant_id: str) -> Optional[Participant]:
+        return await self.repo.get_participant_by_id(participant_id)
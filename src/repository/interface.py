@@ -41,6 +41,11 @@ class SessionRepositoryInterface(ABC):
     async def mark_invite_used(self, invite_code: str) -> None:
         pass
     
+    @abstractmethod
+    async def claim_invite(self, invite_code: str, now: datetime) -> Optional[str]:
+        """Atomically mark unused, unexpired invite as used. Returns session_id if claimed."""
+        pass
+    
     @abstractmethod
     async def update_session_status(self, session_id: str, status: SessionStatus) -> None:
         pass
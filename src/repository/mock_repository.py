@@ -1,5 +1,5 @@
 """Mock repository implementation for testing."""
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 from .interface import SessionRepositoryInterface
@@ -18,8 +18,9 @@ class MockSessionRepository(SessionRepositoryInterface):
         
         # Indexes for efficient lookups
         self.user_sessions: Dict[int, str] = {}  # telegram_user_id -> session_id
-        self.session_participants: Dict[str, List[str]] = {}  # session_id -> [participant_ids]
+        self.session_participants: Dict[str, Dict[str, Participant]] = {}  # session_id -> {participant_id: participant}
         self.session_messages: Dict[str, List[str]] = {}  # session_id -> [message_ids]
+        self.telegram_participants: Dict[Tuple[str, int], Participant] = {}  # (session_id, telegram_user_id) -> participant
     
     async def save_session(self, session: DialogSession) -> None:
         """Save session to memory."""
@@ -34,8 +35,9 @@ class MockSessionRepository(SessionRepositoryInterface):
         self.user_sessions[participant.telegram_user_id] = participant.session_id
         
         if participant.session_id not in self.session_participants:
-            self.session_participants[participant.session_id] = []
-        self.session_participants[participant.session_id].append(participant.participant_id)
+            self.session_participants[participant.session_id] = {}
+        self.session_participants[participant.session_id][participant.participant_id] = participant
+        self.telegram_participants[(participant.session_id, participant.telegram_user_id)] = participant
         
         print(f"✅ Mock: Saved participant @{participant.telegram_username or participant.telegram_user_id} "
               f"role={participant.role.value}")
@@ -58,26 +60,11 @@ class MockSessionRepository(SessionRepositoryInterface):
     
     async def get_participant_by_telegram_id(self, session_id: str, telegram_user_id: int) -> Optional[Participant]:
         """Get participant by telegram user id in specific session."""
-        participant_ids = self.session_participants.get(session_id, [])
-        
-        for participant_id in participant_ids:
-            participant = self.participants.get(participant_id)
-            if participant and participant.telegram_user_id == telegram_user_id:
-                return participant
-        
-        return None
+        return self.telegram_participants.get((session_id, telegram_user_id))
     
     async def get_session_participants(self, session_id: str) -> List[Participant]:
         """Get all participants in session."""
-        participant_ids = self.session_participants.get(session_id, [])
-        participants = []
-        
-        for participant_id in participant_ids:
-            participant = self.participants.get(participant_id)
-            if participant:
-                participants.append(participant)
-                
-        return participants
+        return list(self.session_participants.get(session_id, {}).values())
     
     async def save_invite(self, invite: InviteLink) -> None:
         """Save invite link."""
@@ -95,6 +82,16 @@ class MockSessionRepository(SessionRepositoryInterface):
             invite.is_used = True
             print(f"✅ Mock: Marked invite {invite_code} as used")
     
+    async def claim_invite(self, invite_code: str, now: datetime) -> Optional[str]:
+        """Claim invite. No awaits inside, so this is atomic within the event loop."""
+        invite = self.invites.get(invite_code)
+        if not invite or invite.is_used or invite.expires_at < now:
+            return None
+        
+        invite.is_used = True
+        print(f"✅ Mock: Claimed invite {invite_code}")
+        return invite.session_id
+    
     async def update_session_status(self, session_id: str, status: SessionStatus) -> None:
         """Update session status."""
         session = self.sessions.get(session_id)
@@ -1,5 +1,7 @@
 """Message processing service with AI agent integration."""
+import asyncio
 import logging
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, List
 import uuid
@@ -11,6 +13,13 @@ from ..external_services.agent.interface import AgentInterface, ConversationCont
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ProcessedTurn:
+    """Result of running a user message through the agent."""
+    message: SessionMessage
+    agent_response: AgentResponse
+
+
 class MessageService:
     """Service for processing messages through AI agent."""
     
@@ -41,37 +50,76 @@ class MessageService:
         Returns:
             AgentResponse with AI recommendations, or None if processing failed
         """
+        turn = await self.compute_reply(session_id, participant_id, telegram_message_id, content)
+        if not turn:
+            return None
+        
+        await self.persist_turn(turn)
+        return turn.agent_response
+    
+    async def compute_reply(
+        self,
+        session_id: str,
+        participant_id: str,
+        telegram_message_id: int,
+        content: str,
+        participants_count: Optional[int] = None
+    ) -> Optional[ProcessedTurn]:
+        """
+        Save incoming message and run it through AI agent.
+        
+        Only the work the reply depends on is done here; the remaining
+        writes are left to persist_turn so callers can overlap them
+        with sending the reply.
+        
+        Args:
+            participants_count: Number of session participants if the caller
+                already fetched them; queried from repository otherwise
+            
+        Returns:
+            ProcessedTurn with saved message and agent response, or None if processing failed
+        """
         try:
             # 1. Save incoming message
             message = await self._save_message(
                 session_id, participant_id, telegram_message_id, content
             )
             if not message:
-                logger.error(f"Failed to save message for session {session_id}")
+                logger.error("Failed to save message for session %s", session_id)
                 return None
             
             # 2. Get conversation context
-            context = await self._build_conversation_context(session_id, message)
+            context = await self._build_conversation_context(
+                session_id, message, participants_count
+            )
             if not context:
-                logger.error(f"Failed to build context for session {session_id}")
+                logger.error("Failed to build context for session %s", session_id)
                 return None
             
             # 3. Process through AI agent
             agent_response = await self.agent.process_message(context)
             
+            return ProcessedTurn(message=message, agent_response=agent_response)
+            
+        except Exception as e:
+            logger.error("Error processing message for session %s: %s", session_id, e)
+            return None
+    
+    async def persist_turn(self, turn: ProcessedTurn) -> None:
+        """Persist the non-critical tail of a processed turn."""
+        session_id = turn.message.session_id
+        try:
             # 4. Save agent response if needed
-            if agent_response.session_recommendations:
-                await self._log_agent_insights(session_id, agent_response)
+            if turn.agent_response.session_recommendations:
+                await self._log_agent_insights(session_id, turn.agent_response)
             
             # 5. Mark message as processed
-            await self.session_repo.mark_message_processed(message.message_id)
+            await self.session_repo.mark_message_processed(turn.message.message_id)
             
-            logger.info(f"Successfully processed message {message.message_id} for session {session_id}")
-            return agent_response
+            logger.info("Successfully processed message %s for session %s", turn.message.message_id, session_id)
             
         except Exception as e:
-            logger.error(f"Error processing message for session {session_id}: {e}")
-            return None
+            logger.error("Error persisting turn for session %s: %s", session_id, e)
     
     async def get_session_messages(self, session_id: str) -> List[SessionMessage]:
         """Get all messages for a session."""
@@ -101,25 +149,30 @@ class MessageService:
     async def _build_conversation_context(
         self, 
         session_id: str, 
-        current_message: SessionMessage
+        current_message: SessionMessage,
+        participants_count: Optional[int] = None
     ) -> Optional[ConversationContext]:
         """Build conversation context for agent processing."""
         try:
-            # Get conversation history
-            history = await self.session_repo.get_session_messages(session_id)
-            
-            # Get participants count
-            participants = await self.session_repo.get_session_participants(session_id)
+            if participants_count is None:
+                # Get conversation history and participants concurrently
+                history, participants = await asyncio.gather(
+                    self.session_repo.get_session_messages(session_id),
+                    self.session_repo.get_session_participants(session_id)
+                )
+                participants_count = len(participants)
+            else:
+                history = await self.session_repo.get_session_messages(session_id)
             
             return ConversationContext(
                 session_id=session_id,
                 current_message=current_message,
                 conversation_history=history,
-                participants_count=len(participants)
+                participants_count=participants_count
             )
             
         except Exception as e:
-            logger.error(f"Error building conversation context: {e}")
+            logger.error("Error building conversation context: %s", e)
             return None
     
     async def _log_agent_insights(self, session_id: str, response: AgentResponse):
@@ -127,7 +180,8 @@ class MessageService:
         # TODO: Implement proper logging/storage of agent insights
         # This could be stored in a separate table for analytics
         logger.info(
-            f"Agent insights for session {session_id}: "
-            f"recommendations={response.session_recommendations}, "
-            f"should_end={response.should_end_session}"
+            "Agent insights for session %s: recommendations=%s, should_end=%s",
+            session_id,
+            response.session_recommendations,
+            response.should_end_session
         )
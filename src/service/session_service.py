@@ -1,37 +1,50 @@
 """Session management service."""
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import time
 import uuid
-import secrets
+import os
+import base64
 
 from ..domain.entities import DialogSession, Participant, InviteLink, SessionStatus, ParticipantRole
 from ..repository.interface import SessionRepositoryInterface
 
+_SESSION_TTL = timedelta(hours=24)  # Session expires in 24 hours
+_INVITE_TTL = timedelta(hours=1)    # Invite expires in 1 hour
+
+_ACTIVE_SESSION_CACHE_TTL = 300       # seconds
+_ACTIVE_SESSION_CACHE_SIZE = 10_000
+
 
 class SessionService:
     """Service for managing dialog sessions."""
     
     def __init__(self, session_repo: SessionRepositoryInterface):
         self.session_repo = session_repo
+        
+        # telegram_user_id -> (expires_at monotonic, active session)
+        self._active_sessions: "OrderedDict[int, Tuple[float, DialogSession]]" = OrderedDict()
     
     async def create_session(self, telegram_user_id: int, telegram_username: Optional[str]) -> DialogSession:
         """Create new dialog session with initiator."""
         # Check if user already has an active session
-        existing_session = await self.session_repo.get_user_active_session(telegram_user_id)
+        existing_session = await self.get_user_active_session(telegram_user_id)
         if existing_session:
             print(f"🔄 User {telegram_user_id} already has active session {existing_session.session_id[:8]}...")
             return existing_session
         
         session_id = str(uuid.uuid4())
         participant_id = str(uuid.uuid4())
+        now = datetime.utcnow()
         
         # Create session
         session = DialogSession(
             session_id=session_id,
             status=SessionStatus.WAITING_FOR_PARTNER,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-            expires_at=datetime.utcnow() + timedelta(hours=24)  # Session expires in 24 hours
+            created_at=now,
+            updated_at=now,
+            expires_at=now + _SESSION_TTL
         )
         
         # Create initiator participant
@@ -41,11 +54,12 @@ class SessionService:
             telegram_user_id=telegram_user_id,
             telegram_username=telegram_username,
             role=ParticipantRole.INITIATOR,
-            joined_at=datetime.utcnow()
+            joined_at=now
         )
         
         await self.session_repo.save_session(session)
         await self.session_repo.save_participant(initiator)
+        self._invalidate_active_session(telegram_user_id)
         
         print(f"🎉 Created new session {session_id[:8]}... for user @{telegram_username or telegram_user_id}")
         return session
@@ -59,14 +73,16 @@ class SessionService:
             return None
         
         # Generate shorter, Telegram-friendly invite code (only alphanumeric)
-        invite_code = secrets.token_hex(12)  # 24 chars, only 0-9 and a-f
+        # 80 bits of entropy as 16 lowercase base32 chars (a-z, 2-7)
+        invite_code = base64.b32encode(os.urandom(10)).rstrip(b"=").decode("ascii").lower()
         
+        now = datetime.utcnow()
         invite = InviteLink(
             invite_code=invite_code,
             session_id=session_id,
             created_by=participant.participant_id,
-            created_at=datetime.utcnow(),
-            expires_at=datetime.utcnow() + timedelta(hours=1)  # Invite expires in 1 hour
+            created_at=now,
+            expires_at=now + _INVITE_TTL
         )
         
         await self.session_repo.save_invite(invite)
@@ -80,41 +96,67 @@ class SessionService:
     ) -> bool:
         """Join session using invite code."""
         # Check if user already has an active session
-        existing_session = await self.session_repo.get_user_active_session(telegram_user_id)
+        existing_session = await self.get_user_active_session(telegram_user_id)
         if existing_session:
             print(f"❌ User {telegram_user_id} already has active session")
             return False
         
-        # Validate invite
-        invite = await self.session_repo.get_invite_by_code(invite_code)
-        if not invite or invite.is_used or invite.expires_at < datetime.utcnow():
+        # Validate invite (codes are issued lowercase)
+        now = datetime.utcnow()
+        invite_code = invite_code.lower()
+        # Claim atomically so two users racing one invite can't both join
+        session_id = await self.session_repo.claim_invite(invite_code, now)
+        if not session_id:
             print(f"❌ Invalid or expired invite: {invite_code}")
             return False
         
         # Check session capacity
-        participants = await self.session_repo.get_session_participants(invite.session_id)
+        participants = await self.session_repo.get_session_participants(session_id)
         if len(participants) >= 2:
-            print(f"❌ Session {invite.session_id[:8]}... is full")
+            print(f"❌ Session {session_id[:8]}... is full")
             return False
         
         # Create second participant
         participant_id = str(uuid.uuid4())
         invitee = Participant(
             participant_id=participant_id,
-            session_id=invite.session_id,
+            session_id=session_id,
             telegram_user_id=telegram_user_id,
             telegram_username=telegram_username,
             role=ParticipantRole.INVITEE,
-            joined_at=datetime.utcnow()
+            joined_at=now
         )
         
         await self.session_repo.save_participant(invitee)
-        await self.session_repo.mark_invite_used(invite_code)
-        await self.session_repo.update_session_status(invite.session_id, SessionStatus.ACTIVE)
+        await self.session_repo.update_session_status(session_id, SessionStatus.ACTIVE)
         
-        print(f"🎉 User @{telegram_username or telegram_user_id} joined session {invite.session_id[:8]}...")
+        # Session status changed for everyone in it
+        self._invalidate_active_session(
+            telegram_user_id, *(p.telegram_user_id for p in participants)
+        )
+        
+        print(f"🎉 User @{telegram_username or telegram_user_id} joined session {session_id[:8]}...")
         return True
     
     async def get_user_active_session(self, telegram_user_id: int) -> Optional[DialogSession]:
         """Get user's current active session."""
-        return await self.session_repo.get_user_active_session(telegram_user_id)
+        cached = self._active_sessions.get(telegram_user_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        session = await self.session_repo.get_user_active_session(telegram_user_id)
+        if session:
+            self._active_sessions[telegram_user_id] = (
+                time.monotonic() + _ACTIVE_SESSION_CACHE_TTL, session
+            )
+            self._active_sessions.move_to_end(telegram_user_id)
+            if len(self._active_sessions) > _ACTIVE_SESSION_CACHE_SIZE:
+                self._active_sessions.popitem(last=False)
+        else:
+            self._active_sessions.pop(telegram_user_id, None)
+        return session
+    
+    def _invalidate_active_session(self, *telegram_user_ids: int) -> None:
+        """Drop cached active sessions for given users."""
+        for telegram_user_id in telegram_user_ids:
+            self._active_sessions.pop(telegram_user_id, None)
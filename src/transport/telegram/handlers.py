@@ -1,14 +1,92 @@
 """Telegram bot handlers for AI Mediator."""
+import asyncio
 import logging
+import re
+from typing import List, Optional, Set
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
 from ...service.session_service import SessionService
 from ...service.message_service import MessageService
 from ...config.settings import Settings
+from ...domain.entities import DialogSession, Participant
 
 logger = logging.getLogger(__name__)
 
+# How long processed incoming messages are remembered in Redis
+_SEEN_MESSAGE_TTL = 3600  # seconds
+
+# /command[@bot_username][trailing] [args]; Telegram commands are ASCII only.
+# Non-empty trailing (e.g. "/start-abc") is still a command, just not one of ours.
+_CMD_RE = re.compile(r"^/([A-Za-z0-9_]+)(?:@([A-Za-z0-9_]+))?(\S*)(?:\s+(.*))?$", re.DOTALL)
+
+# Reply templates, filled via str.format_map
+_REPLY_SESSION_CREATED = (
+    "Добро пожаловать в AI Mediator!\n\n"
+    "Сессия создана: `{session_id}...`\n"
+    "Статус: Ожидаем партнера\n\n"
+    "Чтобы пригласить партнера, используйте команду:\n"
+    "/invite"
+)
+_REPLY_SESSION_EXISTS = (
+    "У вас уже есть активная сессия!\n\n"
+    "ID: `{session_id}...`\n"
+    "Статус: {status}\n\n"
+    "Используйте /invite для приглашения партнера"
+)
+_REPLY_JOINED = (
+    "Успешно присоединились к сессии!\n\n"
+    "Теперь вы можете писать сообщения.\n"
+    "Ваши сообщения будут сохраняться в общем контексте диалога.\n\n"
+    "Просто отправьте текстовое сообщение для начала диалога."
+)
+_REPLY_JOIN_FAILED = (
+    "Не удалось присоединиться к сессии.\n\n"
+    "Возможные причины:\n"
+    "• Ссылка истекла (действует 1 час)\n"
+    "• Ссылка уже использована\n"
+    "• Сессия уже заполнена\n"
+    "• У вас уже есть активная сессия\n\n"
+    "Попросите партнера создать новую ссылку командой /invite"
+)
+_REPLY_INVITE_CREATED = (
+    "🔗 Пригласительная ссылка создана!\n\n"
+    "Отправьте это приглашение партнеру.\n\n"
+    "Ссылка действует 1 час\n"
+    "После перехода партнер присоединится к вашей сессии"
+)
+_INVITE_BUTTON_TEXT = "🔗 Перейти к боту"
+_REPLY_AGENT = (
+    "🤖 **AI Медиатор:**\n{message_to_user}\n\n"
+    "📊 **Анализ сессии:**\n{recommendations}\n\n"
+    "📋 **Сессия:** `{session_id}...`"
+)
+_REPLY_END_RECOMMENDED = "\n\n⚠️ **Рекомендация:** Рассмотрите возможность завершения сессии."
+_REPLY_NO_SESSION = (
+    "У вас нет активной сессии.\n\n"
+    "Используйте /start для создания новой сессии или "
+    "перейдите по ссылке-приглашению от партнера."
+)
+_REPLY_NO_SESSION_FOR_INVITE = (
+    "У вас нет активной сессии.\n\n"
+    "Используйте /start для создания новой сессии."
+)
+_REPLY_PARTICIPANT_NOT_FOUND = "Ошибка: не удалось найти информацию об участнике."
+_REPLY_SESSION_CREATE_ERROR = "Ошибка создания сессии. Попробуйте еще раз."
+_REPLY_JOIN_ERROR = "Ошибка присоединения к сессии. Попробуйте еще раз."
+_REPLY_INVITE_ERROR = "Ошибка создания приглашения. Попробуйте еще раз."
+_REPLY_INVITE_LINK_ERROR = "Ошибка создания ссылки приглашения. Попробуйте еще раз."
+_REPLY_MESSAGE_ERROR = "Ошибка обработки сообщения. Попробуйте еще раз."
+_REPLY_ALREADY_PROCESSED = "Это сообщение уже обработано."
+_REPLY_MESSAGE_SAVED = (
+    "Сообщение получено и сохранено!\n\n"
+    "Сессия: `{session_id}...`\n"
+    "Статус: {status}\n\n"
+    "⚠️ AI анализ временно недоступен."
+)
+
 
 class TelegramHandlers:
     """Main Telegram bot handlers."""
@@ -17,27 +95,93 @@ class TelegramHandlers:
         self, 
         session_service: SessionService, 
         message_service: MessageService,
-        settings: Settings
+        settings: Settings,
+        redis: Optional[Redis] = None
     ):
         self.session_service = session_service
         self.message_service = message_service
+        self.redis = redis
         self.bot_username = settings.telegram_bot_username
-
+        self._invite_url_prefix = f"https://t.me/{self.bot_username}?start="
+        
+        # Background persistence tasks, awaited on shutdown
+        self._pending_tasks: Set[asyncio.Task] = set()
+        
         # Validate bot username is set
         if not self.bot_username:
             raise ValueError("TELEGRAM_BOT_USERNAME must be set in environment variables")
     
+    async def shutdown(self, *_):
+        """Wait for background persistence tasks to finish."""
+        if self._pending_tasks:
+            logger.info("Flushing %d pending persistence tasks...", len(self._pending_tasks))
+            await asyncio.gather(*self._pending_tasks, return_exceptions=True)
+    
+    def _run_in_background(self, coro):
+        """Schedule coroutine without blocking the reply path."""
+        task = asyncio.create_task(coro)
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._pending_tasks.discard)
+    
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Route every text update to command or message handler."""
+        match = _CMD_RE.match(update.message.text)
+        if not match:
+            await self.handle_message(update, context)
+            return
+        
+        command, mention, trailing, args = match.groups()
+        if trailing or (mention and mention.lower() != self.bot_username.lower()):
+            # Malformed command or one addressed to another bot
+            return
+        
+        command = command.lower()
+        if command == "start":
+            await self._handle_start(update, args.split() if args else [])
+        elif command == "invite":
+            await self.invite_command(update, context)
+        # Unknown commands are ignored
+    
+    async def _is_seen(self, key: str) -> bool:
+        """
+        Check whether incoming message was already processed.
+        
+        Updates are only redelivered after a restart, so dedup needs
+        state that outlives the process. Without Redis, or when it
+        errors, messages are never treated as duplicates.
+        """
+        if self.redis is None:
+            return False
+        try:
+            return bool(await self.redis.exists(key))
+        except RedisError as e:
+            logger.warning("Redis dedup check failed for %s, skipping dedup: %s", key, e)
+            return False
+    
+    async def _mark_seen(self, key: str) -> None:
+        """Remember incoming message as processed (Redis only, see _is_seen)."""
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(key, 1, ex=_SEEN_MESSAGE_TTL)
+        except RedisError as e:
+            logger.warning("Redis dedup mark failed for %s: %s", key, e)
+    
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command."""
+        await self._handle_start(update, context.args or [])
+    
+    async def _handle_start(self, update: Update, args: List[str]):
+        """Create session or join one via /start invite_code."""
         user = update.effective_user
         user_id = user.id
         username = user.username
         
-        logger.info(f"Received /start from user {user_id} (@{username or 'no_username'})")
+        logger.info("Received /start from user %s (@%s)", user_id, username or 'no_username')
         
         # Check if this is an invite link: /start invite_code
-        if context.args:
-            invite_code = context.args[0]
+        if args:
+            invite_code = args[0]
             await self._handle_invite_join(update, invite_code, user_id, username)
         else:
             # Regular start - create new session
@@ -50,27 +194,21 @@ class TelegramHandlers:
             
             if session.status.value == "waiting_for_partner":
                 await update.message.reply_text(
-                    f"Добро пожаловать в AI Mediator!\n\n"
-                    f"Сессия создана: `{session.session_id[:8]}...`\n"
-                    f"Статус: Ожидаем партнера\n\n"
-                    f"Чтобы пригласить партнера, используйте команду:\n"
-                    f"/invite",
+                    _REPLY_SESSION_CREATED.format_map({"session_id": session.short_id}),
                     parse_mode='Markdown'
                 )
             else:
                 await update.message.reply_text(
-                    f"У вас уже есть активная сессия!\n\n"
-                    f"ID: `{session.session_id[:8]}...`\n"
-                    f"Статус: {session.status.value}\n\n"
-                    f"Используйте /invite для приглашения партнера",
+                    _REPLY_SESSION_EXISTS.format_map({
+                        "session_id": session.short_id,
+                        "status": session.status.value,
+                    }),
                     parse_mode='Markdown'
                 )
                 
         except Exception as e:
-            logger.error(f"Error creating session: {e}")
-            await update.message.reply_text(
-                "Ошибка создания сессии. Попробуйте еще раз."
-            )
+            logger.error("Error creating session: %s", e)
+            await update.message.reply_text(_REPLY_SESSION_CREATE_ERROR)
     
     async def _handle_invite_join(self, update: Update, invite_code: str, user_id: int, username: str):
         """Join session via invite code."""
@@ -78,77 +216,53 @@ class TelegramHandlers:
             success = await self.session_service.join_session(invite_code, user_id, username)
             
             if success:
-                await update.message.reply_text(
-                    f"Успешно присоединились к сессии!\n\n"
-                    f"Теперь вы можете писать сообщения.\n"
-                    f"Ваши сообщения будут сохраняться в общем контексте диалога.\n\n"
-                    f"Просто отправьте текстовое сообщение для начала диалога."
-                )
+                await update.message.reply_text(_REPLY_JOINED)
             else:
-                await update.message.reply_text(
-                    f"Не удалось присоединиться к сессии.\n\n"
-                    f"Возможные причины:\n"
-                    f"• Ссылка истекла (действует 1 час)\n"
-                    f"• Ссылка уже использована\n"
-                    f"• Сессия уже заполнена\n"
-                    f"• У вас уже есть активная сессия\n\n"
-                    f"Попросите партнера создать новую ссылку командой /invite"
-                )
+                await update.message.reply_text(_REPLY_JOIN_FAILED)
                 
         except Exception as e:
-            logger.error(f"Error joining session: {e}")
-            await update.message.reply_text(
-                "Ошибка присоединения к сессии. Попробуйте еще раз."
-            )
+            logger.error("Error joining session: %s", e)
+            await update.message.reply_text(_REPLY_JOIN_ERROR)
     
     async def invite_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /invite command - generate invite link."""
         user = update.effective_user
         user_id = user.id
         
-        logger.info(f"Received /invite from user {user_id}")
+        logger.info("Received /invite from user %s", user_id)
         
         try:
             # Get user's active session
             session = await self.session_service.get_user_active_session(user_id)
             if not session:
-                await update.message.reply_text(
-                    "У вас нет активной сессии.\n\n"
-                    "Используйте /start для создания новой сессии."
-                )
+                await update.message.reply_text(_REPLY_NO_SESSION_FOR_INVITE)
                 return
             
             # Generate invite
             invite = await self.session_service.create_invite(session.session_id, user_id)
             if not invite:
-                await update.message.reply_text(
-                    "Ошибка создания приглашения. Попробуйте еще раз."
-                )
+                await update.message.reply_text(_REPLY_INVITE_ERROR)
                 return
             
-            invite_url = f"https://t.me/{self.bot_username}?start={invite.invite_code}"
+            invite_url = self._invite_url_prefix + invite.invite_code
 
             # Log invite link creation for debugging
-            logger.debug(f"Generated invite link: {invite_url}")
+            logger.debug("Generated invite link: %s", invite_url)
 
             # Create inline keyboard with button
-            keyboard = [[InlineKeyboardButton("🔗 Перейти к боту", url=invite_url)]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = InlineKeyboardMarkup(
+                [[InlineKeyboardButton(_INVITE_BUTTON_TEXT, url=invite_url)]]
+            )
 
             await update.message.reply_text(
-                f"🔗 Пригласительная ссылка создана!\n\n"
-                f"Отправьте это приглашение партнеру.\n\n"
-                f"Ссылка действует 1 час\n"
-                f"После перехода партнер присоединится к вашей сессии",
+                _REPLY_INVITE_CREATED,
                 parse_mode='Markdown',
                 reply_markup=reply_markup
             )
             
         except Exception as e:
-            logger.error(f"Error creating invite: {e}")
-            await update.message.reply_text(
-                "Ошибка создания ссылки приглашения. Попробуйте еще раз."
-            )
+            logger.error("Error creating invite: %s", e)
+            await update.message.reply_text(_REPLY_INVITE_LINK_ERROR)
     
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle regular text messages."""
@@ -157,71 +271,97 @@ class TelegramHandlers:
         message_text = update.message.text
         telegram_message_id = update.message.message_id
         
-        logger.info(f"Received message from user {user_id}: {message_text[:50]}...")
+        logger.info("Received message from user %s: %.50s...", user_id, message_text)
         
         try:
             # Check if user has active session
             session = await self.session_service.get_user_active_session(user_id)
             if not session:
-                await update.message.reply_text(
-                    "У вас нет активной сессии.\n\n"
-                    "Используйте /start для создания новой сессии или "
-                    "перейдите по ссылке-приглашению от партнера."
-                )
+                await update.message.reply_text(_REPLY_NO_SESSION)
                 return
             
-            # Get user's participant info
-            participant = await self.session_service.session_repo.get_participant_by_telegram_id(
-                session.session_id, user_id
+            # Fetch participants once: sender lookup and agent context share it
+            participants = await self.session_service.session_repo.get_session_participants(
+                session.session_id
+            )
+            participant = next(
+                (p for p in participants if p.telegram_user_id == user_id), None
             )
             if not participant:
-                await update.message.reply_text(
-                    "Ошибка: не удалось найти информацию об участнике."
-                )
+                await update.message.reply_text(_REPLY_PARTICIPANT_NOT_FOUND)
                 return
             
-            # Process message through AI agent
-            agent_response = await self.message_service.process_user_message(
-                session.session_id,
-                participant.participant_id,
-                telegram_message_id,
-                message_text
-            )
+            # Skip agent entirely for redelivered updates; message ids are per chat
+            seen_key = f"seen:{session.session_id}:{update.effective_chat.id}:{telegram_message_id}"
+            if await self._is_seen(seen_key):
+                logger.info("Duplicate message %s in session %s", telegram_message_id, session.session_id)
+                await update.message.reply_text(_REPLY_ALREADY_PROCESSED)
+                return
             
-            if agent_response:
-                # Send AI response to user
-                response_text = (
-                    f"🤖 **AI Медиатор:**\n{agent_response.message_to_user}\n\n"
-                    f"📊 **Анализ сессии:**\n{agent_response.session_recommendations or 'Нет дополнительных рекомендаций'}\n\n"
-                    f"📋 **Сессия:** `{session.session_id[:8]}...`"
-                )
-                
-                # Check if session should be ended
-                if agent_response.should_end_session:
-                    response_text += "\n\n⚠️ **Рекомендация:** Рассмотрите возможность завершения сессии."
-                
-                await update.message.reply_text(
-                    response_text,
-                    parse_mode='Markdown'
-                )
-                
-                # If there's a message for partner, handle it here
-                # TODO: Implement partner notification when both users are online
-                if agent_response.message_to_partner:
-                    logger.info(f"Message for partner in session {session.session_id}: {agent_response.message_to_partner}")
-                
-            else:
-                # Fallback if agent processing failed
-                await update.message.reply_text(
-                    f"Сообщение получено и сохранено!\n\n"
-                    f"Сессия: `{session.session_id[:8]}...`\n"
-                    f"Статус: {session.status.value}\n\n"
-                    f"⚠️ AI анализ временно недоступен.",
-                    parse_mode='Markdown'
-                )
+            if await self._process_turn(
+                update, session, participant, len(participants),
+                telegram_message_id, message_text
+            ):
+                # Mark only after agent replied, so failed turns can be redelivered
+                await self._mark_seen(seen_key)
             
         except Exception as e:
-            logger.error(f"Error handling message: {e}")
+            logger.error("Error handling message: %s", e)
+            await update.message.reply_text(_REPLY_MESSAGE_ERROR)
+    
+    async def _process_turn(
+        self,
+        update: Update,
+        session: DialogSession,
+        participant: Participant,
+        participants_count: int,
+        telegram_message_id: int,
+        message_text: str
+    ) -> bool:
+        """Run message through AI agent and reply to sender. Returns True if agent replied."""
+        # Process message through AI agent
+        turn = await self.message_service.compute_reply(
+            session.session_id,
+            participant.participant_id,
+            telegram_message_id,
+            message_text,
+            participants_count=participants_count
+        )
+        
+        if turn:
+            # Persist the rest of the turn while the reply is being sent
+            self._run_in_background(self.message_service.persist_turn(turn))
+            agent_response = turn.agent_response
+            
+            # Send AI response to user
+            response_text = _REPLY_AGENT.format_map({
+                "message_to_user": agent_response.message_to_user,
+                "recommendations": agent_response.session_recommendations or 'Нет дополнительных рекомендаций',
+                "session_id": session.short_id,
+            })
+            
+            # Check if session should be ended
+            if agent_response.should_end_session:
+                response_text += _REPLY_END_RECOMMENDED
+            
             await update.message.reply_text(
-                "Ошибка обработки сообщения. Попробуйте еще раз."
+                response_text,
+                parse_mode='Markdown'
             )
+            
+            # If there's a message for partner, handle it here
+            # TODO: Implement partner notification when both users are online
+            if agent_response.message_to_partner:
+                logger.info("Message for partner in session %s: %s", session.session_id, agent_response.message_to_partner)
+            
+            return True
+        
+        # Fallback if agent processing failed
+        await update.message.reply_text(
+            _REPLY_MESSAGE_SAVED.format_map({
+                "session_id": session.short_id,
+                "status": session.status.value,
+            }),
+            parse_mode='Markdown'
+        )
+        return False
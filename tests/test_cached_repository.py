@@ -0,0 +1,104 @@
+"""Tests for Redis-backed session repository cache."""
+import json
+import pickle
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+
+from src.domain.entities import DialogSession, Participant, ParticipantRole, SessionStatus
+from src.repository.cached_repository import CachedSessionRepository
+from src.repository.mock_repository import MockSessionRepository
+
+SESSION_ID = "0123456789abcdef"
+USER_ID = 111
+PARTNER_ID = 222
+
+
+def _participant(participant_id: str, telegram_user_id: int, role: ParticipantRole) -> Participant:
+    return Participant(
+        participant_id=participant_id,
+        session_id=SESSION_ID,
+        telegram_user_id=telegram_user_id,
+        telegram_username=None,
+        role=role,
+        joined_at=datetime(2024, 1, 1, 12, 0),
+    )
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture
+async def inner():
+    repo = MockSessionRepository()
+    now = datetime(2024, 1, 1, 12, 0)
+    await repo.save_session(DialogSession(
+        session_id=SESSION_ID,
+        status=SessionStatus.WAITING_FOR_PARTNER,
+        created_at=now,
+        updated_at=now,
+        expires_at=now + timedelta(hours=24),
+    ))
+    await repo.save_participant(_participant("p1", USER_ID, ParticipantRole.INITIATOR))
+    return repo
+
+
+@pytest.fixture
+def repo(inner, redis):
+    return CachedSessionRepository(inner, redis, ttl=60)
+
+
+async def test_session_round_trip(repo, inner, redis):
+    expected = await repo.get_user_active_session(USER_ID)
+    assert await redis.exists(f"usess:{USER_ID}")
+
+    # Served from Redis even when the underlying repository no longer has it
+    inner.sessions.clear()
+    cached = await repo.get_user_active_session(USER_ID)
+    assert cached == expected
+    assert cached.short_id == SESSION_ID[:8]
+
+
+async def test_participants_round_trip(repo, inner, redis):
+    expected = await repo.get_session_participants(SESSION_ID)
+    participant = await repo.get_participant_by_telegram_id(SESSION_ID, USER_ID)
+
+    inner.participants.clear()
+    assert await repo.get_session_participants(SESSION_ID) == expected
+    assert await repo.get_participant_by_telegram_id(SESSION_ID, USER_ID) == participant
+    assert participant.role is ParticipantRole.INITIATOR
+
+
+async def test_undecodable_entry_is_reread(repo, redis):
+    key = f"usess:{USER_ID}"
+    await redis.set(key, pickle.dumps({"stale": True}))
+
+    session = await repo.get_user_active_session(USER_ID)
+
+    assert session.session_id == SESSION_ID
+    assert json.loads(await redis.get(key))["session_id"] == SESSION_ID
+
+
+async def test_save_participant_invalidates(repo, redis):
+    await repo.get_session_participants(SESSION_ID)
+    await repo.get_participant_by_telegram_id(SESSION_ID, PARTNER_ID)
+
+    await repo.save_participant(_participant("p2", PARTNER_ID, ParticipantRole.INVITEE))
+
+    assert not await redis.exists(f"parts:{SESSION_ID}")
+    participants = await repo.get_session_participants(SESSION_ID)
+    assert {p.participant_id for p in participants} == {"p1", "p2"}
+    partner = await repo.get_participant_by_telegram_id(SESSION_ID, PARTNER_ID)
+    assert partner.participant_id == "p2"
+
+
+async def test_update_session_status_invalidates(repo, redis):
+    assert await repo.get_user_active_session(USER_ID) is not None
+
+    await repo.update_session_status(SESSION_ID, SessionStatus.COMPLETED)
+
+    assert not await redis.exists(f"usess:{USER_ID}")
+    assert await repo.get_user_active_session(USER_ID) is None
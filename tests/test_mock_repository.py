@@ -0,0 +1,37 @@
+"""Tests for in-memory session repository."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.domain.entities import InviteLink
+from src.repository.mock_repository import MockSessionRepository
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+
+@pytest.fixture
+async def repo():
+    repo = MockSessionRepository()
+    await repo.save_invite(InviteLink(
+        invite_code="CODE",
+        session_id="session-1",
+        created_by="p1",
+        created_at=NOW,
+        expires_at=NOW + timedelta(hours=1),
+    ))
+    return repo
+
+
+async def test_claim_invite_once(repo):
+    assert await repo.claim_invite("CODE", NOW) == "session-1"
+    assert await repo.claim_invite("CODE", NOW) is None
+    assert (await repo.get_invite_by_code("CODE")).is_used
+
+
+async def test_claim_expired_invite(repo):
+    assert await repo.claim_invite("CODE", NOW + timedelta(hours=2)) is None
+    assert not (await repo.get_invite_by_code("CODE")).is_used
+
+
+async def test_claim_unknown_invite(repo):
+    assert await repo.claim_invite("MISSING", NOW) is None
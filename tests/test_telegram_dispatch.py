@@ -0,0 +1,69 @@
+"""Tests for command routing in TelegramHandlers.dispatch."""
+from types import SimpleNamespace
+
+import pytest
+
+from src.transport.telegram.handlers import TelegramHandlers
+
+BOT_USERNAME = "Mediator_Bot"
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    """Handlers with routing targets replaced by recorders."""
+    handlers = TelegramHandlers(None, None, SimpleNamespace(telegram_bot_username=BOT_USERNAME))
+    calls = []
+
+    async def handle_start(update, args):
+        calls.append(("start", args))
+
+    async def invite_command(update, context):
+        calls.append(("invite", None))
+
+    async def handle_message(update, context):
+        calls.append(("message", None))
+
+    monkeypatch.setattr(handlers, "_handle_start", handle_start)
+    monkeypatch.setattr(handlers, "invite_command", invite_command)
+    monkeypatch.setattr(handlers, "handle_message", handle_message)
+
+    async def dispatch(text):
+        await handlers.dispatch(SimpleNamespace(message=SimpleNamespace(text=text)), None)
+        return calls
+
+    return dispatch
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("/start", [("start", [])]),
+    ("/start abc123", [("start", ["abc123"])]),
+    ("/Start abc123", [("start", ["abc123"])]),
+    ("/invite", [("invite", None)]),
+    ("/INVITE", [("invite", None)]),
+    ("/invite@mediator_bot", [("invite", None)]),
+    ("/start@MEDIATOR_BOT abc123", [("start", ["abc123"])]),
+    ("/start\nabc123", [("start", ["abc123"])]),
+])
+async def test_commands_are_routed(routed, text, expected):
+    assert await routed(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "/invite!",
+    "/start-abc",
+    "/start@",
+    "/invite@other_bot",
+    "/unknown",
+])
+async def test_foreign_or_malformed_commands_are_ignored(routed, text):
+    assert await routed(text) == []
+
+
+@pytest.mark.parametrize("text", [
+    "hello",
+    "hello /start",
+    "/старт",
+    "/",
+])
+async def test_plain_text_goes_to_dialog(routed, text):
+    assert await routed(text) == [("message", None)]